@@ -1,109 +1,208 @@
 #!/usr/bin/env python3
-"""Generate a polished, single-page RecoDeck summary PDF without external deps."""
+"""Generate a polished, single-page RecoDeck summary PDF without external deps.
+
+Content-stream operators are formatted directly as bytes with %-formatting, and
+all text is encoded as strict ASCII: the standard Type1 fonts are used without an
+explicit encoding, so a non-ASCII label raises instead of rendering wrongly.
+"""
 
 from __future__ import annotations
 
+import functools
+import itertools
+import os
+import re
+import zlib
+from collections.abc import Sequence
 from pathlib import Path
 
 PAGE_W = 612
 PAGE_H = 792
+MARGIN = 36.0
+LEFT_X = MARGIN
+RIGHT_X = 316.0
+COL_W = 260.0
+
+_ESC_RE = re.compile(rb"([\\()])")
+_ENDOBJ = b"endobj\n"
+
+FONT_REGULAR = "F1"  # Helvetica
+FONT_BOLD = "F2"  # Helvetica-Bold
+
+CARD_FILL = (0.965, 0.973, 0.988)
+CARD_BORDER = (0.808, 0.867, 0.941)
+CARD_ACCENT = (0.133, 0.827, 0.933)
+CARD_TITLE_COLOR = (0.059, 0.09, 0.165)
+CARD_BODY_COLOR = (0.149, 0.192, 0.282)
+
+# Card background, border path and accent strip; only the geometry varies per card.
+_CARD_BG_TMPL = (
+    b"%.3f %.3f %.3f rg\n" % CARD_FILL
+    + b"%.2f %.2f %.2f %.2f re f\n%.2f %.2f %.2f %.2f re S\n"
+    + b"%.3f %.3f %.3f rg\n" % CARD_ACCENT
+    + b"%.2f %.2f %.2f 6.00 re f\n"
+)
+# Card title and body share one text object; only the font switch and colour change between them.
+_CARD_TEXT_TMPL = (
+    b"BT\n/%s %%.2f Tf\n%.3f %.3f %.3f rg\n" % ((FONT_BOLD.encode("ascii"),) + CARD_TITLE_COLOR)
+    + b"1 0 0 1 %.2f %.2f Tm\n(%s) Tj\n"
+    + b"/%s %%.2f Tf\n%.3f %.3f %.3f rg\n" % ((FONT_REGULAR.encode("ascii"),) + CARD_BODY_COLOR)
+    + b"%sET\n"
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _fmt_rgb(r: float, g: float, b: float, op: bytes) -> bytes:
+    return b"%.3f %.3f %.3f %s\n" % (r, g, b, op)
+
+
+# The layout uses a handful of (font, size) pairs, so an unbounded cache is a plain dict lookup.
+@functools.lru_cache(maxsize=None)
+def _font_op(font: str, size: float) -> bytes:
+    return b"/%s %.2f Tf\n" % (font.encode("ascii"), size)
 
 
 class PDFBuilder:
     def __init__(self) -> None:
         self.objects: list[bytes] = [b""]
 
-    def add_obj(self, data: str | bytes) -> int:
-        if isinstance(data, str):
-            payload = data.encode("latin-1")
-        else:
-            payload = data
+    def add_obj_str(self, data: str) -> int:
+        return self.add_obj_bytes(data.encode("ascii"))
+
+    def add_obj_bytes(self, payload: bytes) -> int:
+        # Objects are stored newline-terminated so build() can write them without checks.
+        if not payload.endswith(b"\n"):
+            payload += b"\n"
         self.objects.append(payload)
         return len(self.objects) - 1
 
     def build(self, root_obj: int) -> bytes:
-        out = bytearray()
-        out.extend(b"%PDF-1.4\n%ASCII\n")
-
-        offsets = [0] * len(self.objects)
-        for i in range(1, len(self.objects)):
-            offsets[i] = len(out)
-            out.extend(f"{i} 0 obj\n".encode("ascii"))
-            out.extend(self.objects[i])
-            if not self.objects[i].endswith(b"\n"):
-                out.extend(b"\n")
-            out.extend(b"endobj\n")
-
-        xref = len(out)
-        out.extend(f"xref\n0 {len(self.objects)}\n".encode("ascii"))
-        out.extend(b"0000000000 65535 f \n")
-        for i in range(1, len(self.objects)):
-            out.extend(f"{offsets[i]:010d} 00000 n \n".encode("ascii"))
-
-        out.extend(b"trailer\n")
-        out.extend(f"<< /Size {len(self.objects)} /Root {root_obj} 0 R >>\n".encode("ascii"))
-        out.extend(b"startxref\n")
-        out.extend(f"{xref}\n".encode("ascii"))
-        out.extend(b"%%EOF\n")
-        return bytes(out)
+        preamble = b"%PDF-1.4\n%ASCII\n"
+        count = len(self.objects)
+        objects = self.objects[1:]
+        headers = [b"%d 0 obj\n" % i for i in range(1, count)]
+        # Offsets of each object, plus the xref table start as the final running total.
+        offsets = list(
+            itertools.accumulate(
+                (len(h) + len(o) + len(_ENDOBJ) for h, o in zip(headers, objects)),
+                initial=len(preamble),
+            )
+        )
+        xref = offsets.pop()
+
+        # Every xref entry is exactly 20 bytes, so the table is filled in place.
+        table = bytearray(20 * count)
+        table[0:20] = b"0000000000 65535 f \n"
+        for i, off in enumerate(offsets, 1):
+            table[i * 20 : i * 20 + 20] = b"%010d 00000 n \n" % off
+
+        return b"".join(
+            [
+                preamble,
+                *(frag for h, o in zip(headers, objects) for frag in (h, o, _ENDOBJ)),
+                b"xref\n0 %d\n" % count,
+                table,
+                b"trailer\n",
+                b"<< /Size %d /Root %d 0 R >>\n" % (count, root_obj),
+                b"startxref\n",
+                b"%d\n" % xref,
+                b"%%EOF\n",
+            ]
+        )
 
 
 class Canvas:
     def __init__(self) -> None:
-        self.cmds: list[str] = []
+        # Operators are written into one geometrically growing buffer at self._len.
+        # reset() only rewinds the length, so a reused canvas keeps its capacity.
+        self.buf = bytearray()
+        self.reset()
+
+    def reset(self) -> None:
+        self._len = 0
+        # Last emitted graphics/text state, so unchanged operators can be skipped.
+        # Tf, TL and colours live in the graphics state and survive BT/ET.
+        self._fill: tuple[float, float, float] | None = None
+        self._stroke: tuple[float, float, float] | None = None
+        self._line_w: float | None = None
+        self._font: tuple[str, float] | None = None
+        self._leading: float | None = None
+
+    def _put(self, frag: bytes) -> None:
+        end = self._len + len(frag)
+        self.buf[self._len : end] = frag
+        self._len = end
 
     @staticmethod
-    def esc(text: str) -> str:
-        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
-
-    def add(self, cmd: str) -> None:
-        self.cmds.append(cmd)
+    def esc(text: str) -> bytes:
+        return _ESC_RE.sub(rb"\\\1", text.encode("ascii"))
 
     def fill_rgb(self, r: float, g: float, b: float) -> None:
-        self.add(f"{r:.3f} {g:.3f} {b:.3f} rg")
+        if (r, g, b) == self._fill:
+            return
+        self._fill = (r, g, b)
+        self._put(_fmt_rgb(r, g, b, b"rg"))
 
     def stroke_rgb(self, r: float, g: float, b: float) -> None:
-        self.add(f"{r:.3f} {g:.3f} {b:.3f} RG")
+        if (r, g, b) == self._stroke:
+            return
+        self._stroke = (r, g, b)
+        self._put(_fmt_rgb(r, g, b, b"RG"))
 
     def rect_fill(self, x: float, y: float, w: float, h: float) -> None:
-        self.add(f"{x:.2f} {y:.2f} {w:.2f} {h:.2f} re f")
+        self._put(b"%.2f %.2f %.2f %.2f re f\n" % (x, y, w, h))
+
+    def line_width(self, line_w: float) -> None:
+        if line_w == self._line_w:
+            return
+        self._line_w = line_w
+        self._put(b"%.2f w\n" % line_w)
 
     def rect_stroke(self, x: float, y: float, w: float, h: float, line_w: float = 1.0) -> None:
-        self.add(f"{line_w:.2f} w")
-        self.add(f"{x:.2f} {y:.2f} {w:.2f} {h:.2f} re S")
+        self.line_width(line_w)
+        self._put(b"%.2f %.2f %.2f %.2f re S\n" % (x, y, w, h))
+
+    def set_font(self, font: str, size: float) -> None:
+        if (font, size) == self._font:
+            return
+        self._font = (font, size)
+        self._put(_font_op(font, size))
 
     def text(self, x: float, y: float, text: str, font: str, size: float, color: tuple[float, float, float]) -> None:
-        r, g, b = color
-        self.add("BT")
-        self.add(f"/{font} {size:.2f} Tf")
-        self.add(f"{r:.3f} {g:.3f} {b:.3f} rg")
-        self.add(f"1 0 0 1 {x:.2f} {y:.2f} Tm")
-        self.add(f"({self.esc(text)}) Tj")
-        self.add("ET")
-
-    def multiline(
+        self._put(b"BT\n")
+        self.set_font(font, size)
+        self.fill_rgb(*color)
+        self._put(b"1 0 0 1 %.2f %.2f Tm\n" % (x, y))
+        self._put(b"(%s) Tj\n" % self.esc(text))
+        self._put(b"ET\n")
+
+    def _lines_op(self, x: float, y: float, lines: Sequence[str]) -> bytes:
+        escaped = [self.esc(line) for line in lines]
+        rest = b"".join([b"T*\n(%s) Tj\n" % e for e in escaped[1:]])
+        return b"1 0 0 1 %.2f %.2f Tm\n(%s) Tj\n%s" % (x, y, escaped[0], rest)
+
+    def card_text(
         self,
-        x: float,
-        y: float,
-        lines: list[str],
-        font: str,
-        size: float,
+        x_title: float,
+        y_title: float,
+        title: str,
+        title_size: float,
+        x_body: float,
+        y_body: float,
+        lines: Sequence[str],
+        body_size: float,
         leading: float,
-        color: tuple[float, float, float],
     ) -> None:
-        if not lines:
-            return
-        r, g, b = color
-        self.add("BT")
-        self.add(f"/{font} {size:.2f} Tf")
-        self.add(f"{r:.3f} {g:.3f} {b:.3f} rg")
-        self.add(f"{leading:.2f} TL")
-        self.add(f"1 0 0 1 {x:.2f} {y:.2f} Tm")
-        for idx, line in enumerate(lines):
-            if idx > 0:
-                self.add("T*")
-            self.add(f"({self.esc(line)}) Tj")
-        self.add("ET")
+        # Title and body fonts/colours always differ, so only the leading goes through the cache.
+        body = b""
+        if lines:
+            if leading != self._leading:
+                self._leading = leading
+                body = b"%.2f TL\n" % leading
+            body += self._lines_op(x_body, y_body, lines)
+        self._put(_CARD_TEXT_TMPL % (title_size, x_title, y_title, self.esc(title), body_size, body))
+        self._fill = CARD_BODY_COLOR
+        self._font = (FONT_REGULAR, body_size)
 
     def card(
         self,
@@ -112,103 +211,65 @@ class Canvas:
         w: float,
         h: float,
         title: str,
-        lines: list[str],
+        lines: Sequence[str],
         title_size: float = 11.0,
         body_size: float = 9.2,
         leading: float = 11.0,
     ) -> None:
         y = top - h
-        self.fill_rgb(0.965, 0.973, 0.988)
-        self.rect_fill(x, y, w, h)
-
-        self.stroke_rgb(0.808, 0.867, 0.941)
-        self.rect_stroke(x, y, w, h, line_w=0.8)
+        self.stroke_rgb(*CARD_BORDER)
+        self.line_width(0.8)
+        self._put(_CARD_BG_TMPL % (x, y, w, h, x, y, w, h, x, top - 6.0, w))
 
-        self.fill_rgb(0.133, 0.827, 0.933)
-        self.rect_fill(x, top - 6.0, w, 6.0)
-
-        self.text(x + 12.0, top - 22.0, title, "F2", title_size, (0.059, 0.09, 0.165))
-        self.multiline(x + 12.0, top - 39.0, lines, "F1", body_size, leading, (0.149, 0.192, 0.282))
+        self.card_text(x + 12.0, top - 22.0, title, title_size, x + 12.0, top - 39.0, lines, body_size, leading)
 
     def stream(self) -> bytes:
-        return ("\n".join(self.cmds) + "\n").encode("latin-1")
-
+        with memoryview(self.buf) as view:
+            return bytes(view[: self._len])
 
-def build_content() -> bytes:
-    c = Canvas()
 
-    margin = 36.0
-    c.fill_rgb(1.0, 1.0, 1.0)
-    c.rect_fill(0.0, 0.0, PAGE_W, PAGE_H)
-
-    header_x = margin
-    header_w = PAGE_W - (margin * 2)
-    header_h = 72.0
-    header_top = PAGE_H - margin
-    header_y = header_top - header_h
-
-    c.fill_rgb(0.059, 0.094, 0.196)
-    c.rect_fill(header_x, header_y, header_w, header_h)
-
-    c.fill_rgb(0.165, 0.851, 0.933)
-    c.rect_fill(header_x, header_y, 8.0, header_h)
-
-    c.text(header_x + 18.0, header_top - 31.0, "RecoDeck App Summary", "F2", 25.0, (1.0, 1.0, 1.0))
-    c.text(
-        header_x + 18.0,
-        header_top - 53.0,
-        "One-page, repo-evidence snapshot",
-        "F1",
-        10.8,
-        (0.824, 0.886, 0.969),
-    )
-
-    left_x = margin
-    right_x = 316.0
-    col_w = 260.0
-
-    c.card(
-        left_x,
+# (x, top, w, h, title, lines, title_size, body_size, leading) for each summary card.
+CARDS: tuple[tuple[float, float, float, float, str, tuple[str, ...], float, float, float], ...] = (
+    (
+        LEFT_X,
         670.0,
-        col_w,
+        COL_W,
         116.0,
         "What It Is",
-        [
+        (
             "RecoDeck is a desktop music library app",
             "built with Tauri (Rust backend) and a",
             "React/TypeScript frontend.",
             "It scans local audio folders, stores",
             "metadata in SQLite, and adds playback,",
             "analysis, and AI playlist tools.",
-        ],
-        title_size=12.0,
-        body_size=10.2,
-        leading=12.0,
-    )
-
-    c.card(
-        left_x,
+        ),
+        12.0,
+        10.2,
+        12.0,
+    ),
+    (
+        LEFT_X,
         542.0,
-        col_w,
+        COL_W,
         82.0,
         "Who It Is For",
-        [
+        (
             "Primary persona (inferred from code):",
             "digital DJs managing local libraries",
             "and playlist/set prep workflows.",
-        ],
-        title_size=12.0,
-        body_size=10.2,
-        leading=12.0,
-    )
-
-    c.card(
-        left_x,
+        ),
+        12.0,
+        10.2,
+        12.0,
+    ),
+    (
+        LEFT_X,
         448.0,
-        col_w,
+        COL_W,
         424.0,
         "What It Does",
-        [
+        (
             "- Recursive scan/import for mp3, flac, wav,",
             "  aiff/aif, m4a, and ogg files.",
             "- SQLite-backed tracks, playlists,",
@@ -223,19 +284,18 @@ def build_content() -> bytes:
             "  using cached library context.",
             "- File watcher emits library-changed",
             "  events for automatic refresh.",
-        ],
-        title_size=12.0,
-        body_size=10.0,
-        leading=12.0,
-    )
-
-    c.card(
-        right_x,
+        ),
+        12.0,
+        10.0,
+        12.0,
+    ),
+    (
+        RIGHT_X,
         670.0,
-        col_w,
+        COL_W,
         332.0,
         "How It Works (Architecture)",
-        [
+        (
             "Components and services",
             "- Frontend: React UI + Zustand stores.",
             "- Bridge: src/lib/tauri-api.ts uses invoke().",
@@ -251,50 +311,91 @@ def build_content() -> bytes:
             "2. Rust services read/write DB and files.",
             "3. Rust emits library-changed/audio-* events.",
             "4. Frontend listeners refresh UI state.",
-        ],
-        title_size=12.0,
-        body_size=10.0,
-        leading=11.6,
-    )
-
-    c.card(
-        right_x,
+        ),
+        12.0,
+        10.0,
+        11.6,
+    ),
+    (
+        RIGHT_X,
         326.0,
-        col_w,
+        COL_W,
         168.0,
         "How To Run",
-        [
+        (
             "1. npm install",
             "2. npm run tauri dev",
             "3. In app, click Scan Folder",
             "   (or add folders in Settings).",
-        ],
-        title_size=12.0,
-        body_size=10.4,
-        leading=12.2,
-    )
-
-    c.card(
-        right_x,
+        ),
+        12.0,
+        10.4,
+        12.2,
+    ),
+    (
+        RIGHT_X,
         146.0,
-        col_w,
+        COL_W,
         118.0,
         "Not Found In Repo",
-        [
+        (
             "- Explicit persona statement: Not found in repo.",
             "- Node/Rust version requirements: Not found in repo.",
             "- Production deployment guide: Not found in repo.",
-        ],
-        title_size=12.0,
-        body_size=9.6,
-        leading=11.0,
+        ),
+        12.0,
+        9.6,
+        11.0,
+    ),
+)
+
+
+# The layout is fixed, so the rendered stream and PDF are constants worth computing once.
+@functools.lru_cache(maxsize=1)
+def _default_content() -> bytes:
+    return build_content(Canvas())
+
+
+def build_content(canvas: Canvas | None = None) -> bytes:
+    # Batch drivers can pass their own Canvas to reuse its buffer across renders.
+    if canvas is None:
+        return _default_content()
+    c = canvas
+    c.reset()
+
+    c.fill_rgb(1.0, 1.0, 1.0)
+    c.rect_fill(0.0, 0.0, PAGE_W, PAGE_H)
+
+    header_x = MARGIN
+    header_w = PAGE_W - (MARGIN * 2)
+    header_h = 72.0
+    header_top = PAGE_H - MARGIN
+    header_y = header_top - header_h
+
+    c.fill_rgb(0.059, 0.094, 0.196)
+    c.rect_fill(header_x, header_y, header_w, header_h)
+
+    c.fill_rgb(0.165, 0.851, 0.933)
+    c.rect_fill(header_x, header_y, 8.0, header_h)
+
+    c.text(header_x + 18.0, header_top - 31.0, "RecoDeck App Summary", FONT_BOLD, 25.0, (1.0, 1.0, 1.0))
+    c.text(
+        header_x + 18.0,
+        header_top - 53.0,
+        "One-page, repo-evidence snapshot",
+        FONT_REGULAR,
+        10.8,
+        (0.824, 0.886, 0.969),
     )
 
+    for spec in CARDS:
+        c.card(*spec)
+
     c.text(
-        margin,
+        MARGIN,
         16.0,
         "Evidence: package.json, src/App.tsx, src/lib/tauri-api.ts, src-tauri/src/*, tauri.conf.json",
-        "F1",
+        FONT_REGULAR,
         8.2,
         (0.333, 0.396, 0.49),
     )
@@ -302,33 +403,47 @@ def build_content() -> bytes:
     return c.stream()
 
 
-def write_pdf(output_path: Path) -> None:
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
+@functools.lru_cache(maxsize=1)
+def _build_pdf_bytes() -> bytes:
     canvas_stream = build_content()
 
     pdf = PDFBuilder()
 
-    catalog_obj = pdf.add_obj("<< /Type /Catalog /Pages 2 0 R >>")
-    pages_obj = pdf.add_obj("<< /Type /Pages /Kids [3 0 R] /Count 1 >>")
-    page_obj = pdf.add_obj(
+    catalog_obj = pdf.add_obj_str("<< /Type /Catalog /Pages 2 0 R >>")
+    pages_obj = pdf.add_obj_str("<< /Type /Pages /Kids [3 0 R] /Count 1 >>")
+    page_obj = pdf.add_obj_str(
         "<< /Type /Page /Parent 2 0 R "
         "/MediaBox [0 0 612 792] "
         "/Resources << /Font << /F1 5 0 R /F2 6 0 R >> >> "
         "/Contents 4 0 R >>"
     )
 
-    contents_obj = pdf.add_obj(
-        b"<< /Length " + str(len(canvas_stream)).encode("ascii") + b" >>\nstream\n" + canvas_stream + b"endstream"
+    compressed = zlib.compress(canvas_stream, 9)
+    contents_obj = pdf.add_obj_bytes(
+        b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(compressed) + compressed + b"\nendstream\n"
     )
 
-    helv = pdf.add_obj("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
-    helv_bold = pdf.add_obj("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold >>")
+    helv = pdf.add_obj_str("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    helv_bold = pdf.add_obj_str("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold >>")
 
     if not (catalog_obj == 1 and pages_obj == 2 and page_obj == 3 and contents_obj == 4 and helv == 5 and helv_bold == 6):
         raise RuntimeError("Unexpected PDF object ordering")
 
-    output_path.write_bytes(pdf.build(root_obj=1))
+    return pdf.build(root_obj=1)
+
+
+def write_pdf(output_path: Path) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    data = _build_pdf_bytes()
+    # O_BINARY keeps Windows from translating newlines in the PDF bytes.
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(output_path, flags, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
 
 
 def main() -> None: